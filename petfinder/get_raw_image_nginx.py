@@ -1,59 +1,183 @@
-import mrequests
+import usocket as socket
 host = 'http://192.168.0.94:8080'
+IMAGE_FILE = '/256.my_photo.jpg.raw'
+META_FILE = '/meta.txt'
 
-def get_name_file(filename='/name.txt'):
+# Parse the host once; all requests go to it over one keep-alive socket
+_netloc = host.split('//', 1)[-1]
+_ip, _, _port = _netloc.partition(':')
+_port = int(_port or 80)
+# Seconds a connect or read may stall; the socket is kept between cycles, so a
+# dead Pi or dropped Wi-Fi must raise OSError rather than hang the display loop
+TIMEOUT = 10
+_sock = None
+# Paths whose replies are still queued on the socket, in order
+_pending = []
+
+
+def _connect():
+    global _sock
+    if _sock is None:
+        _sock = socket.socket()
+        _sock.settimeout(TIMEOUT)
+        _sock.connect(socket.getaddrinfo(_ip, _port)[0][-1])
+    return _sock
+
+
+def _disconnect():
+    global _sock, _pending
+    _pending = []
+    if _sock is not None:
+        _sock.close()
+        _sock = None
+
+
+class Response:
+    """ Just enough of mrequests.Response to read one reply off the shared socket """
+
+    def __init__(self, sock):
+        self.sock = sock
+        line = sock.readline()
+        if not line:
+            raise OSError("Connection closed by server")
+        self.status_code = int(line.split(None, 2)[1])
+        self.length = None
+        self.keep_alive = True
+        while True:
+            line = sock.readline()
+            if not line or line == b'\r\n':
+                break
+            name, _, value = line.partition(b':')
+            name = name.strip().lower()
+            if name == b'content-length':
+                self.length = int(value)
+            elif name == b'connection' and value.strip().lower() == b'close':
+                self.keep_alive = False
+        if self.length is None:
+            # No length means the body runs until the server hangs up
+            self.keep_alive = False
+
+    def read(self):
+        if self.length is None:
+            return self.sock.read()
+        data = self.sock.read(self.length) if self.length else b''
+        self.length = 0
+        return data
+
+    @property
+    def text(self):
+        return self.read().decode()
+
+    def save(self, filename, chunk_size=2048):
+        # Stream through one small buffer so the image never sits in RAM whole
+        buf = memoryview(bytearray(chunk_size))
+        with open(filename, 'wb') as fh:
+            while self.length != 0:
+                size = chunk_size if self.length is None else min(chunk_size, self.length)
+                n = self.sock.readinto(buf[:size])
+                if not n:
+                    if self.length:
+                        raise OSError("Connection closed mid-body")
+                    break
+                fh.write(buf[:n])
+                if self.length is not None:
+                    self.length -= n
+
+    def close(self):
+        # Draining an unread body (say a save() that failed halfway) could need it all
+        # in RAM at once, reconnecting is cheaper and keeps the next response lined up
+        if self.length or not self.keep_alive:
+            _disconnect()
+
+
+def _request(path, accept):
+    return "GET {} HTTP/1.1\r\nHost: {}\r\nAccept: {}\r\n\r\n".format(path, _netloc, accept).encode()
+
+
+def _get(path, accept):
+    request = _request(path, accept)
+    for retry in (False, True):
+        try:
+            sock = _connect()
+            sock.write(request)
+            return Response(sock)
+        except OSError:
+            # nginx drops idle keep-alive sockets, so try once more on a fresh one
+            _disconnect()
+            if retry:
+                raise
+
+
+def _pipeline(*requests):
+    """ Write several requests back to back; the getters then read the replies in order """
+    global _pending
     try:
-        url = host + filename
-        r = mrequests.get(url, headers={b"accept": b"text/html"})
-        if r.status_code == 200:
-            r.save(filename)
-            print("Name file saved to '{}'.".format(filename))
-        else:
-            print("Name file Request failed. Status: {}".format(r.status_code))
-        r.close()
-        
-        with open(filename) as fh:
-            contents=fh.read()
-            return contents.strip()
-        
+        _connect().write(b''.join(_request(path, accept) for path, accept in requests))
+    except OSError:
+        # Getters fall back to one request each
+        _disconnect()
+        return
+    _pending = [path for path, _ in requests]
+
+
+def _fetch(path, accept):
+    if _pending and _pending[0] == path:
+        _pending.pop(0)
+        try:
+            return Response(_sock)
+        except OSError:
+            _disconnect()
+    elif _pending:
+        # Out of order, the queued replies are no use to us
+        _disconnect()
+    return _get(path, accept)
+
+
+def get_meta(filename=META_FILE):
+    """ Pet name and width:height in one reply, as written by rpi/queue.sh """
+    try:
+        r = _fetch(filename, "text/html")
+        try:
+            if r.status_code != 200:
+                print("Meta file Request failed. Status: {}".format(r.status_code))
+                return None
+            name, _, size = r.text.strip().partition('\n')
+            width, _, height = size.partition(':')
+            return name, int(width), int(height)
+        finally:
+            r.close()
+
     except Exception as e:
-        print(f"Name file File Get failed. try again",e)
+        _disconnect()
+        print(f"Meta file HTTP Get failed. try again",e)
         pass
 
 
-def get_file(filename='/256.my_photo.jpg.raw'):
+def get_file(filename=IMAGE_FILE):
+    """ Only touch flash on a 200, returns the filename once it is saved """
     try:
-        url = host + filename
-        r = mrequests.get(url, headers={b"accept": b"image/png"})
-        if r.status_code == 200:
+        r = _fetch(filename, "image/png")
+        try:
+            if r.status_code != 200:
+                print("Request failed. Status: {}".format(r.status_code))
+                return None
             r.save(filename)
             print("Image saved to '{}'.".format(filename))
-        else:
-            print("Request failed. Status: {}".format(r.status_code))
-        r.close()
-    except:
+            return filename
+        finally:
+            r.close()
+    except Exception as e:
+        _disconnect()
         print(f"File Get failed. try again",e)
         pass
 
-def get_size(filename='/filesize.txt'):
-    
-    try:
-        
-        url = host + filename
-        r = mrequests.get(url, headers={b"accept": b"text/html"})
-        if r.status_code == 200:
-            r.save(filename)
-            print("File saved to '{}'.".format(filename))
-        else:
-            print("Request failed. Status: {}".format(r.status_code))
-        r.close()
-
-        with open(filename) as fh:
-            contents=fh.read()
-            width, height = contents.split(':')
-        return width,height
-                
-    except Exception as e:
-        print(f"File size HTTP Get failed. try again",e)
-        pass
-    
\ No newline at end of file
+
+def get_all():
+    """ Fetch image and meta with one round trip instead of two """
+    _pipeline((IMAGE_FILE, "image/png"), (META_FILE, "text/html"))
+    saved = get_file()
+    meta = get_meta()
+    # Without a fresh image the meta would describe the wrong picture
+    if saved and meta:
+        name, width, height = meta
+        return width, height, name
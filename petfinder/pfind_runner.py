@@ -27,27 +27,28 @@ print(f"Display is {displayt}")
 if displayt == 'ili9341':
     
     from hardware.esp32_oled_2_8_inch import display, black, white, date_font,sm_font
-    from .get_raw_image_nginx import get_file, get_size, get_name_file 
+    from .get_raw_image_nginx import get_all, IMAGE_FILE
 
     while True:
         
         try:
 
-            get_file()
-            width,height = get_size()
-            print(width,height)
-            width=int(width)
-            height=int(height)
-            name = get_name_file()
+            meta = get_all()
+            if meta is None:
+                # get_file/get_meta already printed why, keep the current picture up
+                print("No new image this round")
+            else:
+                width,height,name = meta
+                print(width,height)
+                
+                if height > 239:
+                    height=239
+                    print("height reduced to  239")
             
-            if height > 239:
-                height=239
-                print("height reduced to  239")
-        
-            display.clear()
-            display.draw_image('/256.my_photo.jpg.raw', 0, 0, width, height)
-            if show_name:
-                display.draw_text(0, 0, name, date_font,  white , black)
+                display.clear()
+                display.draw_image(IMAGE_FILE, 0, 0, width, height)
+                if show_name:
+                    display.draw_text(0, 0, name, date_font,  white , black)
         except Exception as e:
             print(e)
             pass
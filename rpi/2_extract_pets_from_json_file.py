@@ -3,27 +3,61 @@
 """ Extract pet records and create a list of pets and photo urls to crawl in the next step """
 
 import json
+import logging
+import sys
 
-fh = open('pets.json')
-data=json.load(fh)
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
-pets = {}
 
-for k in data['animals']:
-    try:
-        print(f"##############\n{k['name']} {k['photos'][0]['medium']}")
+def animals(fh):
+    """ Yield the pet records one at a time instead of loading the whole dump """
+    if ijson is not None:
+        return ijson.items(fh, 'animals.item', buf_size=64*1024)
+    # No mmap here: json only decodes str/bytes, so mapping the file still ends in a full copy
+    return json.load(fh)['animals']
+
+
+def clean_name(name):
+    """ Make the pet name safe to use as a file name """
+    # Chained replace beats str.translate and re.sub here: replace has a fast path
+    # for single characters, translate with deletions does not
+    return name.replace(' ', '').replace('(', '_').replace(')', '_')
+
+
+logging.basicConfig(level=logging.DEBUG if '-v' in sys.argv[1:] else logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+# Checked once; per-pet logging is only worth paying for with -v
+debug = logger.isEnabledFor(logging.DEBUG)
+
+# Each pet is written as soon as it is parsed, there is no dict of all of them.
+# If a name shows up twice the first listing with a photo wins.
+seen = set()
+kept = skipped_courtesy = skipped_no_photo = 0
+
+with open('pets.json', 'rb') as fh, open('pets.wget.queue.txt', 'w', buffering=1<<20) as out:
+    for k in animals(fh):
         if 'Courtesy' in k['name']:
-           continue
-        k['name'] = k['name'].replace(' ', '')
-        k['name'] = k['name'].replace('(', '_')
-        k['name'] = k['name'].replace(')', '_')
-        #Small pics seems easier to make larger than 
-        #to make large pics to smaller for the ili9341 and underlying libraries 
-        url=k['photos'][0]['small']
-        pets[k['name']]=url 
-    except IndexError:
-        print(f"{k['name']} has no photos")
-
-with open('pets.wget.queue.txt','w') as fh:
-    for k,v in pets.items():
-        fh.write(f"{k}:{v}\n")
+            skipped_courtesy += 1
+            continue
+        try:
+            #Small pics seems easier to make larger than 
+            #to make large pics to smaller for the ili9341 and underlying libraries 
+            url=k['photos'][0]['small']
+        except IndexError:
+            skipped_no_photo += 1
+            if debug:
+                logger.debug(f"{k['name']} has no photos")
+            continue
+        name = clean_name(k['name'])
+        if debug:
+            logger.debug(f"{name} {url}")
+        if name in seen:
+            continue
+        seen.add(name)
+        out.write(f"{name}:{url}\n")
+        kept += 1
+
+logger.info(f"{kept} pets queued, skipped {skipped_courtesy} courtesy listings and {skipped_no_photo} without photos")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+""" Download the pet pics in the crawl list in parallel, reusing connections """
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+WORKERS = 8
+
+
+def download(session, name, url):
+    tmp = f"{name}.jpg.tmp"
+    try:
+        # The with block hands the connection back to the pool even when raise_for_status() fires
+        with session.get(url, stream=True, timeout=30) as r:
+            r.raise_for_status()
+            # Stream beside the target and rename over it, so a dropped download never leaves a truncated .jpg
+            with open(tmp, 'wb') as fh:
+                for chunk in r.iter_content(64*1024):
+                    fh.write(chunk)
+        os.replace(tmp, f"{name}.jpg")
+        print(f"{name}.jpg saved")
+    except Exception as e:
+        print(f"{name} download failed", e)
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+with open('pets.wget.queue.txt') as fh:
+    pets = [line.rstrip('\n').split(':', 1) for line in fh if line.strip()]
+
+with requests.Session() as session, ThreadPoolExecutor(WORKERS) as ex:
+    retry = Retry(total=3, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=WORKERS, pool_maxsize=WORKERS, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    for name, url in pets:
+        ex.submit(download, session, name, url)
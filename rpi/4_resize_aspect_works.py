@@ -2,23 +2,78 @@
 
 """ Resize the photos to the the ILI9341 screen """
 
+import os
+import shutil
 import sys
+from functools import partial
+from multiprocessing import Pool
 
 from PIL import Image
 
-file = sys.argv[1]
-basewidth = int(sys.argv[2])
-new_file=f"{basewidth}.{sys.argv[1]}"
+# The resized file is only an intermediate for 5_img2rgb565.py, so favour encode speed
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': False, 'progressive': False, 'subsampling': 2},
+    'PNG': {'compress_level': 1},
+}
 
-try:
-    img = Image.open(file)
-except Exception as e:
-    print(e)
 
-wpercent = (basewidth/float(img.size[0]))
-hsize = int((float(img.size[1])*float(wpercent)))
-img = img.resize((basewidth,hsize), Image.Resampling.LANCZOS)
-img.save(new_file)
+def resize_image(file, basewidth):
+    new_file=f"{basewidth}.{file}"
 
-width, height = img.size
-print(f"{new_file} is {width} x {height}")
+    # Decode + LANCZOS + encode is the expensive part, skip it if an earlier run already did it
+    try:
+        if os.path.getmtime(new_file) >= os.path.getmtime(file):
+            print(f"{new_file} is up to date")
+            return new_file
+    except OSError:
+        pass
+
+    # Written beside the target and renamed over it, so a failed run never leaves a
+    # truncated new_file that the check above would then call up to date
+    tmp_file = new_file + '.tmp'
+
+    # Image.open is lazy, a truncated file only fails in resize or save, so guard it all:
+    # in a batch one bad picture must not take the pool down with it
+    try:
+        img = Image.open(file)
+        w0, h0 = img.size
+        if w0 == basewidth:
+            # Already the right size, copy the bytes instead of decoding and re-encoding
+            img.close()
+            shutil.copyfile(file, tmp_file)
+            os.replace(tmp_file, new_file)
+            print(f"{new_file} is already {basewidth} wide, copied")
+            return new_file
+
+        # At least one row, or a very wide strip would round down to a 0 high image
+        hsize = max(1, h0 * basewidth // w0)
+        if img.format == 'JPEG':
+            # Let libjpeg decode at 1/2, 1/4 or 1/8 scale, keeping 2x headroom for LANCZOS
+            img.draft('RGB', (basewidth*2, hsize*2))
+        img = img.resize((basewidth,hsize), Image.Resampling.LANCZOS)
+        fmt = Image.registered_extensions().get(os.path.splitext(new_file)[1].lower())
+        img.save(tmp_file, format=fmt, **SAVE_OPTIONS.get(fmt, {}))
+        os.replace(tmp_file, new_file)
+    except Exception as e:
+        print(f"{file} skipped", e)
+        return None
+
+    width, height = img.size
+    print(f"{new_file} is {width} x {height}")
+    return new_file
+
+
+def main_batch(queue_file, basewidth):
+    """ Resize every pet in the wget queue in one run, one worker per core """
+    with open(queue_file) as fh:
+        files = [f"{line.split(':', 1)[0]}.jpg" for line in fh if line.strip()]
+    with Pool(os.cpu_count()) as pool:
+        for _ in pool.imap_unordered(partial(resize_image, basewidth=basewidth), files):
+            pass
+
+
+if __name__ == '__main__':
+    if sys.argv[1] == '--queue':
+        main_batch(sys.argv[2], int(sys.argv[3]))
+    else:
+        resize_image(sys.argv[1], int(sys.argv[2]))
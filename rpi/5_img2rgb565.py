@@ -4,38 +4,115 @@
 
 """Utility to convert images to raw RGB565 format."""
 
-from PIL import Image
-from struct import pack
+from PIL import Image, ImageChops
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from os import path
+import argparse
+import os
 import sys
 
+
+# 8 bit channel value -> the RGB565 bits it puts in each output byte, for Image.point.
+# Red and the top of green fill the high byte, the rest of green and blue the low one
+R_HI = [v & 0xF8 for v in range(256)]
+G_HI = [v >> 5 for v in range(256)]
+G_LO = [(v << 3) & 0xE0 for v in range(256)]
+B_LO = [v >> 3 for v in range(256)]
+
+# Rows packed per pass, so big pictures never need full size temporary bands
+STRIP_ROWS = 256
+
+
 def error(msg):
     """Display error and exit."""
     print (msg)
     sys.exit(-1)
 
 
-def write_bin(f, pixel_list):
-    """Save image in RGB565 format."""
-    for pix in pixel_list:
-        r = (pix[0] >> 3) & 0x1F
-        g = (pix[1] >> 2) & 0x3F
-        b = (pix[2] >> 3) & 0x1F
-        f.write(pack('>H', (r << 11) + (g << 5) + b))
+def positive_int(value):
+    """argparse type for counts that must be at least 1."""
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError('must be at least 1, got {}'.format(value))
+    return n
 
 
-if __name__ == '__main__':
-    args = sys.argv
-    if len(args) != 2:
-        error('Please specify input file: ./img2rgb565.py test.png')
-    in_path = args[1]
-    if not path.exists(in_path):
-        error('File Not Found: ' + in_path)
+def rgb565_bytes(img):
+    """Pack an RGB (or RGBA, alpha ignored) image to big-endian RGB565 inside Pillow."""
+    # Each output byte takes bits from two channels that never overlap,
+    # so adding the looked-up bands is an OR and never clips
+    r, g, b = img.split()[:3]
+    hi = ImageChops.add(r.point(R_HI), g.point(G_HI))
+    lo = ImageChops.add(g.point(G_LO), b.point(B_LO))
+    # LA packs as one (L, A) byte pair per pixel: high byte then low byte
+    return Image.merge('LA', (hi, lo)).tobytes()
+
+
+def convert_img_to_rgb565(in_path, out_path, force=False):
+    """Convert an image file to a raw RGB565 file, unless it is already up to date.
 
+    Returns False when the conversion was skipped.
+    """
+    if not force:
+        try:
+            if path.getmtime(out_path) >= path.getmtime(in_path):
+                return False
+        except OSError:
+            pass
+    img = Image.open(in_path)
+    # JPEG only (a no-op elsewhere): have libjpeg hand back RGB straight from the decoder
+    img.draft('RGB', img.size)
+    # convert() always copies; RGB and RGBA already have the bands we need
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGB')
+    # Write beside the target and rename over it, so queue.sh never picks up a partial .raw
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        if img.height <= STRIP_ROWS:
+            f.write(rgb565_bytes(img))
+        else:
+            for top in range(0, img.height, STRIP_ROWS):
+                bottom = min(top + STRIP_ROWS, img.height)
+                f.write(rgb565_bytes(img.crop((0, top, img.width, bottom))))
+    os.replace(tmp_path, out_path)
+    return True
+
+
+def convert_file(in_path, force=False):
+    """Convert in_path to in_path.raw, return a line for the log."""
     filename, ext = path.splitext(in_path)
     out_path = filename + ext + '.raw'
-    img = Image.open(in_path).convert('RGB')
-    pixels = list(img.getdata())
-    with open(out_path, 'wb') as f:
-        write_bin(f, pixels)
-    print('Saved: ' + out_path)
+    # One unreadable picture must not stop the rest of the batch
+    try:
+        if convert_img_to_rgb565(in_path, out_path, force):
+            return 'Saved: ' + out_path
+    except Exception as e:
+        return 'Failed: {} ({})'.format(in_path, e)
+    return 'Up to date: ' + out_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('files', nargs='+', metavar='FILE', help='image(s) to convert, each saved as FILE.raw')
+    parser.add_argument('-j', '--jobs', type=positive_int, help='worker processes (default: one per core)')
+    parser.add_argument('-f', '--force', action='store_true', help='convert even if FILE.raw is newer than FILE')
+    args = parser.parse_args()
+    # The list comes from the download queue, so pets that failed earlier steps are skipped here
+    files = []
+    for in_path in args.files:
+        if path.exists(in_path):
+            files.append(in_path)
+        else:
+            print('File Not Found: ' + in_path)
+    if not files:
+        error('No files to convert')
+
+    # A single picture is not worth starting worker processes for
+    if len(files) == 1 or args.jobs == 1:
+        for in_path in files:
+            print(convert_file(in_path, args.force))
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as ex:
+            for line in ex.map(partial(convert_file, force=args.force), files):
+                print(line)
@@ -5,12 +5,10 @@
 
 ILI3_ASPECT=319
 
-for FILE in $(ls -1 *jp*g); do 
+# One python process resizes the whole queue instead of one per picture
+./4_resize_aspect_works.py --queue pets.wget.queue.txt $ILI3_ASPECT
 
-    echo == $FILE ==
-    ./4_resize_aspect_works.py $FILE $ILI3_ASPECT
-    SMFILE="${ILI3_ASPECT}.$FILE"
+# ... and one converts them all to RGB565, spread over the cores
+SMFILES=$(for NAME in $(cut -d ':' -f 1 pets.wget.queue.txt); do echo "${ILI3_ASPECT}.${NAME}.jpg"; done)
 
-    ./5_img2rgb565.py $SMFILE
-
-done
+./5_img2rgb565.py $SMFILES
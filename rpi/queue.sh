@@ -10,6 +10,14 @@ while [ 1 ] ; do
             echo == $FILE ==
             cp $FILE /var/www/html/256.my_photo.jpg.raw 
 
+            # Name and size share one small file so the esp32 gets both in a single request
+            # FILE looks like 319.Kiki.jpg.raw - width first, RGB565 is 2 bytes per pixel
+            WIDTH=${FILE%%.*}
+            NAME=${FILE#*.}
+            NAME=${NAME%.jpg.raw}
+            HEIGHT=$(( $(stat -c %s $FILE) / 2 / WIDTH ))
+            printf '%s\n%s:%s\n' "$NAME" "$WIDTH" "$HEIGHT" > /var/www/html/meta.txt
+
             sleep 25 
 
         done